@@ -11,10 +11,20 @@ This script analyzes stocks to identify those that:
 import pandas as pd
 import numpy as np
 import yfinance as yf
+from yfinance.exceptions import YFTickerMissingError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from csv import DictWriter
 from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
+import glob
+import json
 import logging
 import os
+import re
+import sqlite3
 import sys
+import threading
 import time
 
 # Configure logging
@@ -25,6 +35,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# The log format never shows thread or process details, so skip collecting them
+logging.logThreads = False
+logging.logProcesses = False
+
 # Configuration from environment variables
 INPUT_CSV = os.getenv('INPUT_CSV', 'Futures Stocks List.csv')
 PROXIMITY_PERCENTAGE = float(os.getenv('PROXIMITY_PERCENTAGE', '10'))  # Default 10%
@@ -33,7 +47,26 @@ CONSOLIDATION_VOLATILITY_THRESHOLD = float(os.getenv('CONSOLIDATION_VOLATILITY_T
 EMA_TOUCH_TOLERANCE = float(os.getenv('EMA_TOUCH_TOLERANCE', '0.05'))  # Default 5%
 DATA_DAYS = 60  # Days of historical data to fetch
 EMA_PERIOD = 10  # EMA period
-API_DELAY = 0.5  # Delay between API calls to avoid rate limiting
+ALPHA = 2.0 / (EMA_PERIOD + 1)  # EMA smoothing factor
+PROGRESS_INTERVAL = 10  # Log progress every N stocks
+WRITE_DEBUG_CSV = os.getenv('WRITE_DEBUG_CSV', str(DEBUG_MODE)).lower() == 'true'  # Write debug_analysis.csv
+SCREENER_THREADS = int(os.getenv('SCREENER_THREADS', '16'))  # Workers for per-stock fallback fetches
+MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', '4'))  # Cap on parallel Yahoo requests
+RETRY_BACKOFF = 0.3  # Seconds before the first fetch retry; doubles on each further retry
+CACHE_DIR = os.getenv('CACHE_DIR', 'cache')  # Directory for cached price history (empty to disable)
+CACHE_TTL_HOURS = float(os.getenv('CACHE_TTL_HOURS', '6'))  # Hours before cached history is fetched again
+RESULTS_CACHE = os.getenv('RESULTS_CACHE', 'screener.cache')  # SQLite file of analysis results (empty to disable)
+BAD_SYMBOLS_FILE = os.getenv('BAD_SYMBOLS_FILE', 'bad_symbols.txt')  # Symbols with no data (empty to disable)
+BAD_SYMBOL_TTL_DAYS = int(os.getenv('BAD_SYMBOL_TTL_DAYS', '30'))  # Days before a bad symbol is retried
+
+# Limits in-flight per-ticker Yahoo requests across worker threads
+yahoo_requests = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+# Columns of the results CSV
+RESULT_FIELDS = [
+    'Stock Symbol', 'Company Name', 'Current Price', '10 EMA',
+    'Distance from EMA (%)', 'Last Touch Date', 'Volatility Ratio', 'Analysis Date'
+]
 
 # Statistics tracking
 stats = {
@@ -47,32 +80,105 @@ stats = {
 }
 
 
-def calculate_ema(prices, period):
+def calculate_ema(prices, tail=None):
     """
-    Calculate Exponential Moving Average with validation.
+    Calculate the EMA_PERIOD Exponential Moving Average with validation.
     
     EMA formula: EMA = (Close - Previous EMA) * (2 / (period + 1)) + Previous EMA
     
+    The EMA is seeded with the first price, matching pandas'
+    ewm(span=EMA_PERIOD, adjust=False).
+    
     Args:
-        prices: pandas Series of closing prices
-        period: EMA period
+        prices: numpy array (or array-like) of closing prices
+        tail: If given, return only the last `tail` EMA values; the earlier
+            values are folded into the seed with ema_last(). Both the seed
+            and the recurrence are exact on flat prices, so a flat window
+            never looks like a rising EMA.
         
     Returns:
-        pandas Series of EMA values
+        numpy array of EMA values, aligned with the end of prices
     """
-    if len(prices) < period:
-        raise ValueError(f"Insufficient data: need at least {period} data points, got {len(prices)}")
+    if len(prices) < EMA_PERIOD:
+        raise ValueError(f"Insufficient data: need at least {EMA_PERIOD} data points, got {len(prices)}")
+    
+    alpha = ALPHA
+    values = np.asarray(prices, dtype=np.float64)
     
-    ema = prices.ewm(span=period, adjust=False).mean()
+    # Start the recurrence at the first requested value
+    start = 0 if tail is None else max(len(values) - tail, 0)
+    seed = ema_last(values[:start + 1]) if start else float(values[0])
+    
+    # Run the recurrence on Python floats; cheaper than per-element array access.
+    # Stepping by alpha * (price - ema) keeps a flat price series exactly flat.
+    ema = [seed]
+    for price in values[start + 1:].tolist():
+        ema.append(ema[-1] + alpha * (price - ema[-1]))
+    ema = np.array(ema)
     
     # Validate EMA values
-    if ema.isna().all() or (ema == 0).all():
+    if np.isnan(ema).all() or (ema == 0).all():
         raise ValueError("EMA calculation resulted in invalid values (NaN or zero)")
     
     return ema
 
 
-def check_ema_touch(prices, ema_values, lookback_days=7):
+def ema_weights(n):
+    """
+    Closed-form weights of an n-point EMA_PERIOD EMA, oldest price first.
+    
+    The adjust=False recurrence unrolls to a weighted sum of the prices:
+    the seed (first) price has weight (1 - alpha)^(n-1) and the price k bars
+    before the last has weight alpha * (1 - alpha)^k.
+    
+    Args:
+        n: Number of prices
+        
+    Returns:
+        numpy array: Weight vector of length n
+    """
+    weights = ALPHA * (1 - ALPHA) ** np.arange(n - 1, -1, -1, dtype=np.float64)
+    weights[0] = (1 - ALPHA) ** (n - 1)
+    return weights
+
+
+def ema_last(prices):
+    """
+    Calculate only the latest EMA_PERIOD EMA value.
+    
+    Equal to calculate_ema(prices)[-1] (up to float rounding) without
+    building the full series; used for the uptrend and proximity checks,
+    which reject most stocks. The weighted sum is taken over the price
+    changes relative to the last price, so a flat series gives exactly
+    that price and never appears to trade above its EMA.
+    
+    Args:
+        prices: numpy array (or array-like) of closing prices
+        
+    Returns:
+        float: Latest EMA value
+    """
+    values = np.asarray(prices, dtype=np.float64)
+    n = len(values)
+    
+    if n <= len(EMA_WEIGHTS):
+        # Reuse the tail of the precomputed weights, fixing up the seed weight
+        weights = EMA_WEIGHTS[-n:].copy()
+        weights[0] = (1 - ALPHA) ** (n - 1)
+    else:
+        weights = ema_weights(n)
+    
+    # The weights sum to 1, so anchoring on the last price leaves the value
+    # unchanged but makes it exact when the prices are all equal
+    last = values[-1]
+    return float(last + weights @ (values - last))
+
+
+# Weights for the longest history a fetch normally returns (one bar per calendar day)
+EMA_WEIGHTS = ema_weights(DATA_DAYS + 30)
+
+
+def check_ema_touch(low, close, ema, dates, lookback_days=7):
     """
     Check if price touched or came close to EMA in the last N days.
     
@@ -81,48 +187,58 @@ def check_ema_touch(prices, ema_values, lookback_days=7):
     - Price crossed the EMA (was below it at some point)
     
     Args:
-        prices: DataFrame with High, Low, Close columns
-        ema_values: Series of EMA values
+        low: numpy array of daily lows
+        close: numpy array of closing prices
+        ema: numpy array of EMA values
+        dates: DatetimeIndex aligned with the price arrays
         lookback_days: Number of recent days to check
         
     Returns:
         tuple: (touched: bool, last_touch_date: str or None, touch_distance: float)
     """
-    if len(prices) < lookback_days:
+    if len(close) < lookback_days:
         return False, None, None
     
-    recent_data = prices.tail(lookback_days)
-    recent_ema = ema_values.tail(lookback_days)
+    start = len(close) - lookback_days
+    low = low[start:]
+    close = close[start:]
+    ema = ema[start:]
     
-    last_touch_date = None
-    min_distance = float('inf')
+    # Skip days with an invalid EMA value
+    valid = (ema != 0) & ~np.isnan(ema)
     
-    for i, (idx, row) in enumerate(recent_data.iterrows()):
-        ema_val = recent_ema.iloc[i]
-        if ema_val == 0 or pd.isna(ema_val):
-            continue
-            
-        # Calculate distance from EMA (as percentage)
-        low_distance = abs(row['Low'] - ema_val) / ema_val
-        
-        # Check if low came within EMA_TOUCH_TOLERANCE of EMA
-        if low_distance <= EMA_TOUCH_TOLERANCE:
-            # Always update to the most recent touch date
-            last_touch_date = idx.strftime('%Y-%m-%d')
-            if low_distance < min_distance:
-                min_distance = low_distance
-        
-        # Check if price crossed below EMA (actual crossing is strongest signal)
-        if row['Close'] <= ema_val:
-            # Crossing below EMA is the best touch signal
-            last_touch_date = idx.strftime('%Y-%m-%d')
-            min_distance = 0
+    # Price crossing below EMA is the best touch signal (distance 0)
+    crossings = valid & (close <= ema)
+    crossed = crossings.any()
+    
+    # After a crossing, only later lows can move the touch date, so the low
+    # distances are computed from the day after the last crossing
+    first = int(np.flatnonzero(crossings)[-1]) + 1 if crossed else 0
+    
+    # Calculate distance from EMA (as percentage)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        low_distance = low[first:] - ema[first:]
+        np.abs(low_distance, out=low_distance)
+        low_distance /= ema[first:]
     
-    touched = last_touch_date is not None
-    return touched, last_touch_date, min_distance if touched else None
+    # Low came within EMA_TOUCH_TOLERANCE of EMA
+    low_touches = valid[first:] & (low_distance <= EMA_TOUCH_TOLERANCE)
+    
+    # Use the most recent touch date
+    if low_touches.any():
+        last_touch = first + np.flatnonzero(low_touches)[-1]
+    elif crossed:
+        last_touch = first - 1
+    else:
+        return False, None, None
+    last_touch_date = dates[start + last_touch].strftime('%Y-%m-%d')
+    
+    min_distance = 0.0 if crossed else float(low_distance[low_touches].min())
+    
+    return True, last_touch_date, min_distance
 
 
-def check_consolidation(prices, ema_values, period=10):
+def check_consolidation(high, low, close, ema, period=10):
     """
     Check if price shows consolidation behavior around EMA.
     
@@ -132,35 +248,42 @@ def check_consolidation(prices, ema_values, period=10):
     - EMA is rising (uptrend confirmation)
     
     Args:
-        prices: DataFrame with High, Low, Close columns
-        ema_values: Series of EMA values
+        high: numpy array of daily highs
+        low: numpy array of daily lows
+        close: numpy array of closing prices
+        ema: numpy array of EMA values
         period: Period to check for consolidation
         
     Returns:
         tuple: (is_consolidating: bool, volatility_ratio: float, avg_distance: float, ema_rising: bool)
     """
-    if len(prices) < period:
+    if len(close) < period:
         return False, None, None, False
     
-    recent_data = prices.tail(period)
-    recent_ema = ema_values.tail(period)
+    start = len(close) - period
+    high = high[start:]
+    low = low[start:]
+    close = close[start:]
+    ema = ema[start:]
     
     # Calculate Average True Range (ATR) as a measure of volatility
-    high_low = recent_data['High'] - recent_data['Low']
-    atr = high_low.mean()
+    atr = float((high - low).mean())
     
     # Calculate average price
-    avg_price = recent_data['Close'].mean()
+    avg_price = float(close.mean())
     
     # Volatility ratio (ATR / average price)
     volatility_ratio = atr / avg_price if avg_price > 0 else 1
     
-    # Check if price stayed relatively close to EMA (within 20% on average)
-    ema_distances = abs(recent_data['Close'] - recent_ema) / recent_ema
-    avg_distance = ema_distances.mean()
+    # Check if price stayed relatively close to EMA (within 20% on average),
+    # computed in place to avoid intermediate arrays
+    ema_distances = close - ema
+    np.abs(ema_distances, out=ema_distances)
+    ema_distances /= ema
+    avg_distance = float(ema_distances.mean())
     
     # Check if EMA is rising (uptrend confirmation)
-    ema_rising = recent_ema.iloc[-1] > recent_ema.iloc[0]
+    ema_rising = bool(ema[-1] > ema[0])
     
     # Consolidation criteria: low volatility AND staying close to EMA AND EMA rising
     is_consolidating = (
@@ -172,18 +295,405 @@ def check_consolidation(prices, ema_values, period=10):
     return is_consolidating, volatility_ratio, avg_distance, ema_rising
 
 
-def analyze_stock(symbol, company_name):
+def cache_path(symbol, date=None):
     """
-    Analyze a single stock based on EMA criteria with comprehensive logging.
+    Build the cache file path for a stock's history fetched on a given day.
+    
+    Args:
+        symbol: Stock ticker symbol
+        date: Fetch date (default: today)
+        
+    Returns:
+        str: Path of the cache file
+    """
+    date = date or datetime.now()
+    return os.path.join(CACHE_DIR, f"{symbol}_{date:%Y%m%d}.pkl")
+
+
+def fresh_cache_path(symbol):
+    """
+    Find a stock's history cached today and less than CACHE_TTL_HOURS ago.
+    
+    History fetched during a trading session ends in an unfinished bar, so
+    it must not be reused for the rest of the day.
+    
+    Args:
+        symbol: Stock ticker symbol
+        
+    Returns:
+        str: Path of the cache file, or None if there is no fresh entry
+    """
+    if not CACHE_DIR:
+        return None
+    
+    path = cache_path(symbol)
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+    
+    return path if age < CACHE_TTL_HOURS * 3600 else None
+
+
+def load_cached_history(symbol):
+    """
+    Load a stock's history cached earlier today, if still fresh.
+    
+    Args:
+        symbol: Stock ticker symbol
+        
+    Returns:
+        pandas DataFrame with OHLCV history, or None if not cached
+    """
+    path = fresh_cache_path(symbol)
+    if not path:
+        return None
+    
+    try:
+        return pd.read_pickle(path)
+    except Exception as e:
+        logger.warning(f"Could not read cached history for {symbol}: {str(e)}")
+        return None
+
+
+def save_cached_history(symbol, hist):
+    """
+    Cache a stock's history for reruns later today, replacing older entries.
+    
+    Args:
+        symbol: Stock ticker symbol
+        hist: DataFrame with OHLCV history
+    """
+    if not CACHE_DIR or hist is None or hist.empty:
+        return
+    
+    path = cache_path(symbol)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for old_path in glob.glob(os.path.join(CACHE_DIR, f"{glob.escape(symbol)}_*.pkl")):
+            if old_path != path:
+                os.remove(old_path)
+        hist.to_pickle(path)
+    except Exception as e:
+        logger.warning(f"Could not cache history for {symbol}: {str(e)}")
+
+
+def load_bad_symbols():
+    """
+    Load symbols that recently returned no data, dropping expired entries.
+    
+    Each line of BAD_SYMBOLS_FILE is "symbol,YYYYMMDD" with the date the
+    symbol was found to have no data. Entries older than BAD_SYMBOL_TTL_DAYS
+    are retried.
+    
+    Returns:
+        set: Symbols to skip in this run
+    """
+    if not BAD_SYMBOLS_FILE or not os.path.exists(BAD_SYMBOLS_FILE):
+        return set()
+    
+    cutoff = (datetime.now() - timedelta(days=BAD_SYMBOL_TTL_DAYS)).strftime('%Y%m%d')
+    try:
+        with open(BAD_SYMBOLS_FILE) as f:
+            entries = [line.strip().split(',') for line in f if line.strip()]
+        current = [(symbol, date) for symbol, date in entries if date >= cutoff]
+        
+        # Rewrite the file without expired entries
+        if len(current) < len(entries):
+            with open(BAD_SYMBOLS_FILE, 'w') as f:
+                f.writelines(f"{symbol},{date}\n" for symbol, date in current)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {BAD_SYMBOLS_FILE}: {str(e)}")
+        return set()
+    
+    return {symbol for symbol, _ in current}
+
+
+def record_bad_symbol(symbol):
+    """
+    Remember a symbol that returned no data so later runs skip fetching it.
+    
+    Args:
+        symbol: Stock ticker symbol
+    """
+    if not BAD_SYMBOLS_FILE:
+        return
+    
+    try:
+        with open(BAD_SYMBOLS_FILE, 'a') as f:
+            f.write(f"{symbol},{datetime.now():%Y%m%d}\n")
+    except OSError as e:
+        logger.warning(f"Could not update {BAD_SYMBOLS_FILE}: {str(e)}")
+
+
+def fetch_history(symbol, missing_is_final=True):
+    """
+    Fetch historical data for a single stock with retry logic.
+    
+    Args:
+        symbol: Stock ticker symbol
+        missing_is_final: Trust Yahoo's "no price data" / "no timezone"
+            answers and don't retry them. Pass False when Yahoo may be
+            unavailable, since a failed timezone lookup reports the same error.
+        
+    Returns:
+        pandas DataFrame with OHLCV history (may be empty)
+        
+    Raises:
+        YFTickerMissingError: Yahoo has no price data or timezone for the symbol
+    """
+    hist = load_cached_history(symbol)
+    if hist is not None:
+        return hist
+    
+    # One Ticker for all attempts; yfinance shares its HTTP session across tickers
+    stock = yf.Ticker(symbol)
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=DATA_DAYS + 30)  # Extra buffer
+    
+    max_retries = 3
+    hist = None
+    for attempt in range(max_retries):
+        try:
+            # Get historical data, without the dividend/split columns. Raise
+            # errors rather than getting an empty frame, so that failed
+            # requests can be told apart from symbols without data.
+            with yahoo_requests:
+                hist = stock.history(
+                    start=start_date, end=end_date, actions=False, auto_adjust=True,
+                    raise_errors=True
+                )
+            if not hist.empty:
+                break
+        
+        except Exception as e:
+            # Yahoo answered that it doesn't know the symbol; retrying won't
+            # change that
+            if missing_is_final and isinstance(e, YFTickerMissingError):
+                raise
+            if attempt < max_retries - 1:
+                logger.warning(f"Attempt {attempt + 1} failed for {symbol}, retrying...")
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)  # Exponential backoff before retry
+            else:
+                raise e
+    
+    save_cached_history(symbol, hist)
+    return hist
+
+
+def slice_history(data, symbol):
+    """
+    Extract one stock's history from a multi-ticker yf.download result.
+    
+    Args:
+        data: DataFrame returned by yf.download(..., group_by='ticker')
+        symbol: Stock ticker symbol
+        
+    Returns:
+        pandas DataFrame with the stock's OHLCV history (may be empty)
+    """
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol in data.columns.get_level_values(0):
+            return data[symbol].dropna()
+        return pd.DataFrame()
+    
+    # Single-ticker downloads may come back with flat columns
+    return data.dropna()
+
+
+def download_history(symbols):
+    """
+    Fetch historical data for many stocks in a single batched request.
+    
+    Args:
+        symbols: List of stock ticker symbols
+        
+    Returns:
+        dict: Mapping of symbol to DataFrame with OHLCV history. Symbols that
+        the batch request returned no data for are mapped to an empty DataFrame;
+        if the request itself failed, the symbols not loaded from cache are
+        left out.
+    """
+    histories = {}
+    for symbol in symbols:
+        hist = load_cached_history(symbol)
+        if hist is not None:
+            histories[symbol] = hist
+    
+    to_download = [symbol for symbol in symbols if symbol not in histories]
+    if histories:
+        logger.info(f"Loaded {len(histories)} stocks from cache, downloading {len(to_download)}")
+    if not to_download:
+        return histories
+    
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=DATA_DAYS + 30)  # Extra buffer
+    
+    try:
+        data = yf.download(
+            to_download,
+            start=start_date,
+            end=end_date,
+            group_by='ticker',
+            threads=True,
+            progress=False,
+            auto_adjust=True,
+            actions=False
+        )
+    except Exception as e:
+        logger.error(f"Batch download failed: {str(e)}")
+        return histories
+    
+    for symbol in to_download:
+        hist = slice_history(data, symbol)
+        save_cached_history(symbol, hist)
+        histories[symbol] = hist
+    
+    return histories
+
+
+def screening_config():
+    """
+    Serialize the settings that affect analysis results.
+    
+    Cached results are only reused when these settings and the layouts of
+    the result and debug records are unchanged.
+    
+    Returns:
+        str: JSON encoding of the screening settings
+    """
+    return json.dumps([
+        PROXIMITY_PERCENTAGE, LOOKBACK_DAYS, CONSOLIDATION_VOLATILITY_THRESHOLD,
+        EMA_TOUCH_TOLERANCE, DATA_DAYS, EMA_PERIOD, RESULT_FIELDS, DEBUG_FIELDS
+    ])
+
+
+def last_bar(hist):
+    """
+    Identify a stock's most recent bar.
+    
+    Args:
+        hist: DataFrame with OHLCV history
+        
+    Returns:
+        tuple: (bar date as YYYYMMDD int, closing price)
+    """
+    return int(hist.index[-1].strftime('%Y%m%d')), round(float(hist['Close'].iloc[-1]), 4)
+
+
+def open_results_cache():
+    """
+    Open the SQLite cache of per-stock analysis results.
+    
+    Returns:
+        sqlite3.Connection, or None if the cache is disabled or unavailable
+    """
+    if not RESULTS_CACHE:
+        return None
+    
+    try:
+        conn = sqlite3.connect(RESULTS_CACHE)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "symbol TEXT PRIMARY KEY, last_bar_ts INTEGER, last_close REAL, "
+            "config TEXT, payload TEXT)"
+        )
+        return conn
+    except sqlite3.Error as e:
+        logger.warning(f"Results cache unavailable: {str(e)}")
+        return None
+
+
+def load_cached_results(conn, symbols):
+    """
+    Find stored analysis results that are still current.
+    
+    A stored result is reused when the stock's latest bar (date and close)
+    has not changed since it was analyzed. Checking that only needs the
+    last couple of bars, which is much cheaper than the full history.
+    Stocks with fresh history cached on disk are skipped here since
+    re-analyzing them needs no network.
+    
+    Args:
+        conn: Results cache connection
+        symbols: List of stock ticker symbols
+        
+    Returns:
+        dict: Mapping of symbol to stored payload (JSON string)
+    """
+    wanted = set(symbols)
+    stored = {}
+    try:
+        rows = conn.execute(
+            "SELECT symbol, last_bar_ts, last_close, payload FROM cache WHERE config = ?",
+            (screening_config(),)
+        )
+        for symbol, last_bar_ts, last_close, payload in rows:
+            if symbol in wanted and not fresh_cache_path(symbol):
+                stored[symbol] = ((last_bar_ts, last_close), payload)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not read results cache: {str(e)}")
+        return {}
+    
+    if not stored:
+        return {}
+    
+    candidates = list(stored)
+    try:
+        data = yf.download(
+            candidates,
+            period='2d',
+            group_by='ticker',
+            threads=True,
+            progress=False,
+            auto_adjust=True,
+            actions=False
+        )
+    except Exception as e:
+        logger.warning(f"Could not check latest bars: {str(e)}")
+        return {}
+    
+    cached = {}
+    for symbol in candidates:
+        hist = slice_history(data, symbol)
+        if not hist.empty and last_bar(hist) == stored[symbol][0]:
+            cached[symbol] = stored[symbol][1]
+    
+    return cached
+
+
+def save_cached_results(conn, analyzed):
+    """
+    Store analysis results for reuse by later runs.
+    
+    Args:
+        conn: Results cache connection
+        analyzed: dict mapping symbol to (last_bar tuple, analysis outcome tuple)
+    """
+    config = screening_config()
+    rows = [
+        (symbol, bar[0], bar[1], config, json.dumps(outcome))
+        for symbol, (bar, outcome) in analyzed.items()
+    ]
+    try:
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)", rows)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not update results cache: {str(e)}")
+
+
+def init_debug_info(symbol, company_name):
+    """
+    Create the debug record for a stock with every check marked as not run.
     
     Args:
         symbol: Stock ticker symbol
         company_name: Company name
         
     Returns:
-        tuple: (result: dict or None, debug_info: dict)
+        dict: Debug record for debug_analysis.csv
     """
-    debug_info = {
+    return {
         'Stock Symbol': symbol,
         'Company Name': company_name,
         'Current Price': None,
@@ -200,57 +710,85 @@ def analyze_stock(symbol, company_name):
         'Final Result': 'FAIL',
         'Failure Reason': None
     }
+
+
+# Columns of the debug CSV, in the order init_debug_info() creates them
+DEBUG_FIELDS = list(init_debug_info('', ''))
+
+
+def analyze_stock(symbol, company_name, record_missing=True):
+    """
+    Fetch a single stock's history and analyze it.
     
+    Used as a fallback for symbols the batched download returned no data for.
+    
+    Args:
+        symbol: Stock ticker symbol
+        company_name: Company name
+        record_missing: Treat Yahoo reporting no price data or timezone for the
+            symbol as final and add it to BAD_SYMBOLS_FILE. Pass False when
+            Yahoo may be unavailable.
+        
+    Returns:
+        tuple: (bar, outcome) where bar is the last_bar() of the fetched
+        history (None if there was none) and outcome is the
+        (result, debug_info, stat) tuple of analyze_stock_from_df
+    """
     try:
-        logger.info(f"Analyzing {symbol} - {company_name}")
-        stats['total_analyzed'] += 1
+        hist = fetch_history(symbol, missing_is_final=record_missing)
+    except Exception as e:
+        if not (record_missing and isinstance(e, YFTickerMissingError)):
+            logger.error(f"Error analyzing {symbol}: {str(e)}")
+            debug_info = init_debug_info(symbol, company_name)
+            debug_info['Failure Reason'] = f'Error: {str(e)}'
+            return None, (None, debug_info, 'data_errors')
         
-        # Fetch historical data with retry logic
-        max_retries = 3
-        hist = None
-        for attempt in range(max_retries):
-            try:
-                stock = yf.Ticker(symbol)
-                end_date = datetime.now()
-                start_date = end_date - timedelta(days=DATA_DAYS + 30)  # Extra buffer
-                
-                # Get historical data
-                hist = stock.history(start=start_date, end=end_date)
-                if not hist.empty:
-                    break
-                    
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"Attempt {attempt + 1} failed for {symbol}, retrying...")
-                    time.sleep(1)  # Wait before retry
-                else:
-                    raise e
+        # Yahoo has no price data or timezone for the symbol (as opposed to
+        # a failed request); skip it in later runs
+        record_bad_symbol(symbol)
+        hist = pd.DataFrame()
+    
+    bar = last_bar(hist) if hist is not None and not hist.empty else None
+    return bar, analyze_stock_from_df(symbol, company_name, hist)
+
+
+def analyze_stock_from_df(symbol, company_name, hist):
+    """
+    Analyze a single stock based on EMA criteria with comprehensive logging.
+    
+    Performs no I/O; the historical data is fetched by the caller.
+    
+    Args:
+        symbol: Stock ticker symbol
+        company_name: Company name
+        hist: DataFrame with High, Low, Close history
+        
+    Returns:
+        tuple: (result: dict or None, debug_info: dict, stat: key of the
+        stats counter the outcome is counted under)
+    """
+    debug_info = init_debug_info(symbol, company_name)
+    
+    try:
+        logger.debug("Analyzing %s - %s", symbol, company_name)
         
         if hist is None or hist.empty or len(hist) < EMA_PERIOD + 5:
             logger.warning(f"Insufficient data for {symbol}")
-            stats['data_errors'] += 1
             debug_info['Failure Reason'] = 'Insufficient data'
-            return None, debug_info
+            return None, debug_info, 'data_errors'
         
-        # Calculate 10 EMA with validation
-        try:
-            hist['EMA_10'] = calculate_ema(hist['Close'], EMA_PERIOD)
-        except ValueError as e:
-            logger.warning(f"EMA calculation failed for {symbol}: {str(e)}")
-            stats['data_errors'] += 1
-            debug_info['Failure Reason'] = f'EMA calculation error: {str(e)}'
-            return None, debug_info
+        close = hist['Close'].to_numpy()
         
-        # Get most recent data
-        current_price = hist['Close'].iloc[-1]
-        current_ema = hist['EMA_10'].iloc[-1]
+        # Get most recent data as Python scalars. Only the latest EMA value is
+        # needed until the uptrend and proximity checks pass.
+        current_price = float(close[-1])
+        current_ema = ema_last(close)
         
         # Validate EMA value
-        if pd.isna(current_ema) or current_ema == 0:
+        if np.isnan(current_ema) or current_ema == 0:
             logger.warning(f"Invalid EMA value for {symbol}: {current_ema}")
-            stats['data_errors'] += 1
             debug_info['Failure Reason'] = 'Invalid EMA value'
-            return None, debug_info
+            return None, debug_info, 'data_errors'
         
         debug_info['Current Price'] = round(current_price, 2)
         debug_info['10 EMA'] = round(current_ema, 2)
@@ -260,10 +798,9 @@ def analyze_stock(symbol, company_name):
         debug_info['In Uptrend'] = in_uptrend
         
         if not in_uptrend:
-            logger.debug(f"{symbol}: ❌ Not in uptrend (price {current_price:.2f} <= EMA {current_ema:.2f})")
-            stats['failed_uptrend'] += 1
+            logger.debug("%s: ❌ Not in uptrend (price %.2f <= EMA %.2f)", symbol, current_price, current_ema)
             debug_info['Failure Reason'] = 'Not in uptrend'
-            return None, debug_info
+            return None, debug_info, 'failed_uptrend'
         
         # Calculate distance from EMA
         distance_pct = ((current_price - current_ema) / current_ema) * 100
@@ -271,16 +808,29 @@ def analyze_stock(symbol, company_name):
         
         # Check if within proximity range (0-10% above EMA)
         if distance_pct > PROXIMITY_PERCENTAGE:
-            logger.debug(f"{symbol}: ❌ Too far from EMA ({distance_pct:.2f}% > {PROXIMITY_PERCENTAGE}%)")
-            stats['failed_proximity'] += 1
+            logger.debug("%s: ❌ Too far from EMA (%.2f%% > %s%%)", symbol, distance_pct, PROXIMITY_PERCENTAGE)
             debug_info['Failure Reason'] = f'Too far from EMA ({distance_pct:.2f}%)'
-            return None, debug_info
+            return None, debug_info, 'failed_proximity'
+        
+        # Calculate the 10 EMA with validation. The touch and consolidation
+        # checks only look at the most recent bars, so only that window of
+        # the EMA series is computed.
+        window = max(LOOKBACK_DAYS, EMA_PERIOD)
+        try:
+            ema = calculate_ema(close, tail=window)
+        except ValueError as e:
+            logger.warning(f"EMA calculation failed for {symbol}: {str(e)}")
+            debug_info['Failure Reason'] = f'EMA calculation error: {str(e)}'
+            return None, debug_info, 'data_errors'
+        
+        # Read the remaining price columns once, aligned with the EMA window
+        close = close[-window:]
+        high = hist['High'].to_numpy()[-window:]
+        low = hist['Low'].to_numpy()[-window:]
         
         # Check for recent EMA touch
         touched, last_touch_date, touch_distance = check_ema_touch(
-            hist[['High', 'Low', 'Close']],
-            hist['EMA_10'],
-            LOOKBACK_DAYS
+            low, close, ema, hist.index[-window:], LOOKBACK_DAYS
         )
         
         debug_info['EMA Touched'] = touched
@@ -289,15 +839,13 @@ def analyze_stock(symbol, company_name):
             debug_info['Touch Distance %'] = round(touch_distance * 100, 2)
         
         if not touched:
-            logger.debug(f"{symbol}: ❌ No recent EMA touch in last {LOOKBACK_DAYS} days")
-            stats['failed_ema_touch'] += 1
+            logger.debug("%s: ❌ No recent EMA touch in last %d days", symbol, LOOKBACK_DAYS)
             debug_info['Failure Reason'] = f'No EMA touch in last {LOOKBACK_DAYS} days'
-            return None, debug_info
+            return None, debug_info, 'failed_ema_touch'
         
         # Check for consolidation
         is_consolidating, volatility_ratio, avg_distance, ema_rising = check_consolidation(
-            hist[['High', 'Low', 'Close']],
-            hist['EMA_10']
+            high, low, close, ema, EMA_PERIOD
         )
         
         debug_info['Is Consolidating'] = is_consolidating
@@ -317,16 +865,14 @@ def analyze_stock(symbol, company_name):
             else:
                 reason = 'Not consolidating'
             
-            logger.debug(f"{symbol}: ❌ {reason}")
-            stats['failed_consolidation'] += 1
+            logger.debug("%s: ❌ %s", symbol, reason)
             debug_info['Failure Reason'] = reason
-            return None, debug_info
+            return None, debug_info, 'failed_consolidation'
         
         # Stock passed all criteria
-        stats['passed_all'] += 1
         debug_info['Final Result'] = 'PASS'
         
-        logger.info(f"✅ {symbol} PASSED all criteria!")
+        logger.info("✅ %s PASSED all criteria!", symbol)
         if DEBUG_MODE:
             logger.debug(f"  Price: {current_price:.2f}, EMA: {current_ema:.2f}, Distance: {distance_pct:.2f}%")
             logger.debug(f"  Touch Date: {last_touch_date}, Volatility: {volatility_ratio:.4f}")
@@ -343,19 +889,21 @@ def analyze_stock(symbol, company_name):
             'Analysis Date': datetime.now().strftime('%Y-%m-%d')
         }
         
-        return result, debug_info
+        return result, debug_info, 'passed_all'
         
     except Exception as e:
         logger.error(f"Error analyzing {symbol}: {str(e)}")
-        stats['data_errors'] += 1
         debug_info['Failure Reason'] = f'Error: {str(e)}'
-        return None, debug_info
+        return None, debug_info, 'data_errors'
 
 
+@lru_cache(maxsize=None)
 def get_ticker_mapping():
     """
     Map company names to NSE ticker symbols.
     
+    The mapping is built once per process and shared; callers must not modify it.
+    
     Returns:
         dict: Mapping of company name keywords to ticker symbols
     """
@@ -440,33 +988,41 @@ def read_stock_list(filename):
         list: List of tuples (symbol, company_name)
     """
     try:
-        df = pd.read_csv(filename)
+        names = pd.read_csv(filename, usecols=['Name'])['Name']
         
         # Get ticker mapping
         ticker_map = get_ticker_mapping()
         
-        # Extract company names and map to tickers
+        # Fallback tickers derived from the first significant word of each name,
+        # skipping common prefixes in favour of the second word
+        words = names.str.split()
+        first_word = words.str[0].str.upper()
+        second_word = words.str[1].str.upper()
+        derived = first_word.where(
+            ~first_word.isin(['THE', 'M/S', 'SHRI', 'SRI']) | second_word.isna(),
+            second_word
+        )
+        
+        # Match all mapping keys in one regex scan. Longer keys are tried first
+        # so that e.g. 'Tech Mahindra' wins over 'Mahindra'.
+        lower_map = {key.lower(): value for key, value in ticker_map.items()}
+        pattern = re.compile('|'.join(
+            re.escape(key) for key in sorted(lower_map, key=len, reverse=True)
+        ))
+        lower_names = names.str.lower()
+        
+        # Map company names to tickers
         stocks = []
-        for idx, row in df.iterrows():
-            company_name = row['Name']
-            
+        for company_name, lower_name, derived_ticker in zip(
+            names.tolist(), lower_names.tolist(), derived.tolist()
+        ):
             # Try to find ticker from mapping
-            ticker = None
-            for key, value in ticker_map.items():
-                if key.lower() in company_name.lower():
-                    ticker = value
-                    break
+            match = pattern.search(lower_name)
+            ticker = lower_map[match.group(0)] if match else None
             
-            # If no mapping found, try to derive from company name
+            # If no mapping found, use the ticker derived from the company name
             if not ticker:
-                # Extract potential ticker from first significant word
-                words = company_name.split()
-                if words:
-                    # Use first word as base, clean up common suffixes
-                    ticker = words[0].upper()
-                    # If it's a common word, try second word
-                    if ticker in ['THE', 'M/S', 'SHRI', 'SRI']:
-                        ticker = words[1].upper() if len(words) > 1 else ticker
+                ticker = derived_ticker
             
             # Add .NS suffix for NSE (National Stock Exchange of India)
             symbol = f"{ticker}.NS"
@@ -481,6 +1037,51 @@ def read_stock_list(filename):
         sys.exit(1)
 
 
+def write_csv(filename, fieldnames, rows):
+    """
+    Write rows of dicts to a CSV file with the standard library csv writer.
+    
+    Args:
+        filename: Path of the CSV file
+        fieldnames: Column names, in output order
+        rows: List of dicts keyed by column name
+    """
+    with open(filename, 'w', newline='') as f:
+        writer = DictWriter(f, fieldnames=fieldnames, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def log_progress(done, total):
+    """
+    Log analysis progress every PROGRESS_INTERVAL stocks and on completion.
+    
+    Args:
+        done: Number of stocks analyzed so far
+        total: Total number of stocks
+    """
+    if done % PROGRESS_INTERVAL == 0 or done == total:
+        logger.info(f"Progress: {done}/{total}")
+
+
+def with_company_name(outcome, company_name):
+    """
+    Copy an analysis outcome for another stock list row with the same symbol.
+    
+    Args:
+        outcome: Tuple (result, debug_info, stat) from analyze_stock
+        company_name: Company name of the row
+        
+    Returns:
+        tuple: (result, debug_info, stat) with the company name replaced
+    """
+    result, debug_info, stat = outcome
+    debug_info = {**debug_info, 'Company Name': company_name}
+    if result:
+        result = {**result, 'Company Name': company_name}
+    return result, debug_info, stat
+
+
 def main():
     """Main execution function."""
     # Reset statistics at the start of each run
@@ -501,6 +1102,7 @@ def main():
     logger.info(f"  EMA Touch Tolerance: {EMA_TOUCH_TOLERANCE * 100}%")
     logger.info(f"  Data Days: {DATA_DAYS}")
     logger.info(f"  Debug Mode: {DEBUG_MODE}")
+    logger.info(f"  Write Debug CSV: {WRITE_DEBUG_CSV}")
     logger.info("=" * 70)
     
     # Read stock list
@@ -511,20 +1113,95 @@ def main():
     debug_results = []
     total_stocks = len(stock_list)
     
-    for i, (symbol, company_name) in enumerate(stock_list, 1):
-        logger.info(f"Progress: {i}/{total_stocks}")
-        result, debug_info = analyze_stock(symbol, company_name)
+    # Skip symbols that recently returned no data
+    bad_symbols = load_bad_symbols()
+    if bad_symbols:
+        skipped = sum(symbol in bad_symbols for symbol, _ in stock_list)
+        logger.info(f"Skipping {skipped} symbols listed in {BAD_SYMBOLS_FILE}")
+    
+    symbols = list(dict.fromkeys(
+        symbol for symbol, _ in stock_list if symbol not in bad_symbols
+    ))
+    
+    # Reuse stored results for stocks without a new bar since the last run
+    results_cache = open_results_cache()
+    cached_results = load_cached_results(results_cache, symbols) if results_cache else {}
+    if cached_results:
+        logger.info(f"Reusing cached analysis for {len(cached_results)} stocks")
+    
+    # Fetch history for the remaining stocks in one batched request
+    to_fetch = [symbol for symbol in symbols if symbol not in cached_results]
+    histories = {}
+    if to_fetch:
+        logger.info(f"Downloading historical data for {len(to_fetch)} stocks...")
+        histories = download_history(to_fetch)
+    
+    # Analyze stocks covered by the batch download; queue the rest for
+    # individual fetching
+    outcomes = {}
+    analyzed = {}
+    fallback = {}
+    for i, (symbol, company_name) in enumerate(stock_list):
+        if symbol in bad_symbols:
+            debug_info = init_debug_info(symbol, company_name)
+            debug_info['Failure Reason'] = f'No data (listed in {BAD_SYMBOLS_FILE})'
+            outcomes[i] = (None, debug_info, 'data_errors')
+        elif symbol in cached_results:
+            result, debug_info, stat = json.loads(cached_results[symbol])
+            debug_info['Company Name'] = company_name
+            if result:
+                result['Company Name'] = company_name
+                result['Analysis Date'] = datetime.now().strftime('%Y-%m-%d')
+            outcomes[i] = (result, debug_info, stat)
+        else:
+            hist = histories.get(symbol)
+            if hist is None or hist.empty:
+                fallback.setdefault(symbol, []).append((i, company_name))
+                continue
+            
+            outcomes[i] = analyze_stock_from_df(symbol, company_name, hist)
+            analyzed[symbol] = (last_bar(hist), outcomes[i])
+        
+        log_progress(len(outcomes), total_stocks)
+    
+    # Fetch the remaining stocks concurrently - the work is network-bound
+    if fallback:
+        logger.info(f"No batched data for {len(fallback)} symbols, fetching individually...")
+        with ThreadPoolExecutor(max_workers=SCREENER_THREADS) as executor:
+            futures = {
+                # Only blacklist symbols the batch request answered for; if it
+                # failed outright, Yahoo may be down
+                executor.submit(analyze_stock, symbol, rows[0][1], symbol in histories): symbol
+                for symbol, rows in fallback.items()
+            }
+            for future in as_completed(futures):
+                # Fetch each symbol once and share the outcome between the
+                # stock list rows that map to it
+                symbol = futures[future]
+                bar, outcome = future.result()
+                if bar is not None:
+                    analyzed[symbol] = (bar, outcome)
+                for i, company_name in fallback[symbol]:
+                    outcomes[i] = with_company_name(outcome, company_name)
+                    log_progress(len(outcomes), total_stocks)
+    
+    if results_cache:
+        save_cached_results(results_cache, analyzed)
+        results_cache.close()
+    
+    # Collect results in stock list order
+    for i in range(total_stocks):
+        result, debug_info, stat = outcomes[i]
+        stats['total_analyzed'] += 1
+        stats[stat] += 1
         
         # Add to debug results
-        debug_results.append(debug_info)
+        if WRITE_DEBUG_CSV:
+            debug_results.append(debug_info)
         
         # Add to results if passed
         if result:
             results.append(result)
-        
-        # Rate limiting - add small delay between API calls
-        if i < total_stocks:
-            time.sleep(API_DELAY)
     
     # Print statistics summary
     logger.info("=" * 70)
@@ -540,21 +1217,19 @@ def main():
     logger.info("=" * 70)
     
     # Create debug CSV with all stocks
-    debug_df = pd.DataFrame(debug_results)
-    debug_output_file = 'debug_analysis.csv'
-    debug_df.to_csv(debug_output_file, index=False)
-    logger.info(f"Debug analysis saved to: {debug_output_file}")
+    if WRITE_DEBUG_CSV:
+        debug_output_file = 'debug_analysis.csv'
+        write_csv(debug_output_file, DEBUG_FIELDS, debug_results)
+        logger.info(f"Debug analysis saved to: {debug_output_file}")
     
-    # Create results DataFrame
+    # Save results
     if results:
-        results_df = pd.DataFrame(results)
-        
         # Sort by proximity to EMA (closest first)
-        results_df = results_df.sort_values('Distance from EMA (%)')
+        results.sort(key=itemgetter('Distance from EMA (%)'))
         
         # Save to CSV
         output_file = 'ema_screener_results.csv'
-        results_df.to_csv(output_file, index=False)
+        write_csv(output_file, RESULT_FIELDS, results)
         
         logger.info("=" * 70)
         logger.info("SCREENING COMPLETE!")
@@ -565,7 +1240,7 @@ def main():
         print("\n" + "=" * 70)
         print(f"Top {min(10, len(results))} Results:")
         print("=" * 70)
-        print(results_df.head(10).to_string(index=False))
+        print(pd.DataFrame(results[:10]).to_string(index=False))
         print("=" * 70)
     else:
         logger.warning("=" * 70)
@@ -581,10 +1256,7 @@ def main():
         logger.warning("=" * 70)
         
         # Create empty results file
-        pd.DataFrame(columns=[
-            'Stock Symbol', 'Company Name', 'Current Price', '10 EMA',
-            'Distance from EMA (%)', 'Last Touch Date', 'Volatility Ratio', 'Analysis Date'
-        ]).to_csv('ema_screener_results.csv', index=False)
+        write_csv('ema_screener_results.csv', RESULT_FIELDS, [])
 
 
 if __name__ == "__main__":